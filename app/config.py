@@ -9,15 +9,18 @@ class Settings(BaseSettings):
     STORED_SECRET: str
     OPENAI_API_KEY: str
     QUIZ_TIMEOUT_SECONDS: int = 180
+    QUIZ_CONCURRENCY: int = 8
     MAX_RETRIES: int = 3
     BROWSER_HEADLESS: bool = True
+    BROWSER_POOL_SIZE: int = 4
+    PDF_WORKERS: int = 2
 
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
 
 
-@lru_cache()
+@lru_cache(maxsize=None)
 def get_settings() -> Settings:
     """Get cached settings instance."""
     return Settings()
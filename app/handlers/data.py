@@ -1,29 +1,105 @@
+import csv
 import io
 import json
 import logging
 import re
-from typing import Any, Optional, Tuple
+from itertools import islice
+from typing import Any, Callable, Optional, Tuple, Union
 
 import httpx
+import numpy as np
+import orjson
 import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pa_csv
+from selectolax.lexbor import LexborHTMLParser
 
+from app.handlers.html_utils import cache_by_html, table_rows
+from app.services.http import HttpClient
 from app.services.llm import LLMService
 
 logger = logging.getLogger(__name__)
 
+_CUTOFF_RE = re.compile(r'(?:cutoff|threshold|greater than|above)[:\s]*(\d+)', re.IGNORECASE)
+_JSON_OBJ_RE = re.compile(r'\{[^{}]+\}')
+
+# Rows and columns of a table rendered into the LLM context
+_PREVIEW_ROWS = 200
+_PREVIEW_COLS = 20
+
+# Maximum characters of data included in the LLM prompt
+_MAX_PROMPT_DATA_CHARS = 10000
+
+# Limits for scanning inline page data
+_MAX_HTML_SCAN_CHARS = 256 * 1024
+_MAX_HTML_TABLES = 8
+_MAX_SCRIPT_JSON_MATCHES = 16
+
+# Leading bytes inspected to detect the CSV delimiter and header
+_CSV_SNIFF_BYTES = 4096
+
+# Operation keywords -> reduction over the flattened numeric cells, checked in order
+_STAT_REDUCERS: Tuple[Tuple[Tuple[str, ...], Callable[[np.ndarray], Any]], ...] = (
+    (("sum",), np.nansum),
+    (("mean", "average"), lambda arr: np.nanmean(arr) if arr.size else np.nan),
+    (("count",), lambda arr: arr.shape[0]),
+    (("max",), lambda arr: np.nanmax(arr) if arr.size else np.nan),
+    (("min",), lambda arr: np.nanmin(arr) if arr.size else np.nan),
+)
+
+try:
+    from numba import njit, prange
+
+    @njit(parallel=True, cache=True)
+    def _sum_above(arr: np.ndarray, cutoff: float) -> Tuple[float, int]:
+        """Sum and count the values strictly greater than cutoff (NaN is ignored)."""
+        total = 0.0
+        count = 0
+        for i in prange(arr.size):
+            v = arr[i]
+            if v > cutoff:
+                total += v
+                count += 1
+        return total, count
+
+    # Compile once at import so the first request does not pay for the JIT
+    _sum_above(np.zeros(1, dtype=np.float64), 0.0)
+
+except ImportError:
+    logger.warning("numba not available, using numpy for cutoff sums")
+
+    def _sum_above(arr: np.ndarray, cutoff: float) -> Tuple[float, int]:
+        """Sum and count the values strictly greater than cutoff (NaN is ignored)."""
+        mask = arr > cutoff
+        return float(arr[mask].sum()), int(mask.sum())
+
+
+def _loads_json(content: Union[str, bytes, bytearray]) -> Any:
+    """Parse JSON with orjson, falling back to the stdlib for NaN/Infinity literals."""
+    try:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError:
+        return json.loads(content)
+
+
+def _dumps_json(data: Any) -> str:
+    """Render JSON with two-space indentation."""
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+
 
 class DataHandler:
     """Handle data analysis quiz tasks."""
 
-    def __init__(self, llm: LLMService):
+    def __init__(self, llm: LLMService, client: httpx.AsyncClient):
         self.llm = llm
-        self.client = httpx.AsyncClient(timeout=60.0)
+        self.client = client
 
     async def solve(
         self,
         question: str,
         download_url: Optional[str],
         raw_html: str,
+        prefetched: Optional[Tuple[Any, str]] = None,
     ) -> Any:
         """
         Solve a data-related quiz.
@@ -32,20 +108,16 @@ class DataHandler:
             question: The quiz question
             download_url: Optional URL to download data file
             raw_html: The raw HTML content (may contain inline data)
+            prefetched: Result of an earlier ``load(download_url)`` call, if any
 
         Returns:
             The computed answer
         """
-        df = None
-        data_content = ""
-
         # Try to get data from download URL as DataFrame
-        if download_url:
-            try:
-                df, data_content = await self._fetch_data_as_df(download_url)
-                logger.info(f"Loaded DataFrame with shape: {df.shape if df is not None else 'None'}")
-            except Exception as e:
-                logger.error(f"Error fetching data: {e}")
+        if prefetched is not None:
+            df, data_content = prefetched
+        else:
+            df, data_content = await self.load(download_url)
 
         # If no data from URL, try to extract from HTML
         if not data_content:
@@ -58,14 +130,17 @@ class DataHandler:
                 logger.info(f"Computed answer directly: {direct_answer}")
                 return direct_answer
 
-        # Fall back to LLM analysis
+        # Fall back to LLM analysis (only reached when direct computation did not apply)
+        if len(data_content) > _MAX_PROMPT_DATA_CHARS:
+            data_content = data_content[:_MAX_PROMPT_DATA_CHARS]
+
         enhanced_prompt = f"""Analyze this data-related quiz carefully.
 
 QUIZ QUESTION:
 {question}
 
 DATA FROM FILE:
-{data_content[:10000]}  # Truncated if too long
+{data_content}  # Truncated if too long
 
 CRITICAL INSTRUCTIONS:
 1. Read the question VERY carefully to understand what answer format is expected
@@ -92,103 +167,183 @@ EXAMPLE for cutoff questions:
 
         return answer
 
-    async def _try_direct_computation(self, question: str, df: pd.DataFrame) -> Optional[Any]:
-        """Try to compute the answer directly using pandas if we detect a pattern."""
-        question_lower = question.lower()
+    async def load(self, download_url: Optional[str]) -> Tuple[Any, str]:
+        """
+        Download and parse a data file.
+
+        Returns (table, rendered text); (None, "") when there is no URL or
+        the fetch fails.
+        """
+        if not download_url:
+            return None, ""
 
+        try:
+            df, data_content = await self._fetch_data_as_df(download_url)
+            logger.info(f"Loaded DataFrame with shape: {df.shape if df is not None else 'None'}")
+            return df, data_content
+        except Exception as e:
+            logger.error(f"Error fetching data: {e}")
+            return None, ""
+
+    async def _try_direct_computation(
+        self,
+        question: str,
+        df: Union[pd.DataFrame, pa.Table],
+    ) -> Optional[Any]:
+        """Try to compute the answer directly using pandas if we detect a pattern."""
         # Detect cutoff/threshold pattern
-        cutoff_match = re.search(r'cutoff[:\s]*(\d+)', question_lower)
-        if not cutoff_match:
-            cutoff_match = re.search(r'threshold[:\s]*(\d+)', question_lower)
-        if not cutoff_match:
-            cutoff_match = re.search(r'greater than[:\s]*(\d+)', question_lower)
-        if not cutoff_match:
-            cutoff_match = re.search(r'above[:\s]*(\d+)', question_lower)
+        cutoff_match = _CUTOFF_RE.search(question)
 
         if cutoff_match:
             cutoff = int(cutoff_match.group(1))
             logger.info(f"Detected cutoff value: {cutoff}")
 
-            # Get numeric values from DataFrame
-            numeric_values = []
-            for col in df.columns:
-                try:
-                    numeric_values.extend(pd.to_numeric(df[col], errors='coerce').dropna().tolist())
-                except:
-                    pass
-
-            # If DataFrame has no columns (single column CSV), try the first column
-            if not numeric_values and len(df.columns) == 1:
-                try:
-                    numeric_values = pd.to_numeric(df.iloc[:, 0], errors='coerce').dropna().tolist()
-                except:
-                    pass
-
-            # Also try if the DataFrame index contains numbers (headerless CSV)
-            if not numeric_values:
-                try:
-                    # Re-read as headerless
-                    numeric_values = df.iloc[:, 0].tolist()
-                except:
-                    pass
-
-            if numeric_values:
+            # Arrow tables are only converted once we know pandas is needed
+            if isinstance(df, pa.Table):
+                df = df.to_pandas()
+
+            # Numeric columns are used as-is; only text columns need coercion (failures
+            # become NaN). Timestamps are skipped rather than turned into epoch numbers
+            numeric = df.select_dtypes(include=[np.number, "bool"])
+            other = df.select_dtypes(include=["object", "string"])
+            arr = np.concatenate(
+                [
+                    numeric.to_numpy(dtype='float64', na_value=np.nan).ravel(),
+                    pd.to_numeric(other.to_numpy().ravel(), errors='coerce'),
+                ],
+                dtype='float64',
+            )
+
+            if not np.isnan(arr).all():
                 # Filter values greater than cutoff and sum
-                filtered = [v for v in numeric_values if isinstance(v, (int, float)) and v > cutoff]
-                result = sum(filtered)
-                logger.info(f"Filtered {len(filtered)} values > {cutoff}, sum = {result}")
-                return int(result) if result == int(result) else result
+                total, count = _sum_above(arr, float(cutoff))
+                result = float(total)
+                logger.info(f"Filtered {count} values > {cutoff}, sum = {result}")
+                return int(result) if result.is_integer() else result
 
         return None
 
-    async def _fetch_data_as_df(self, url: str) -> Tuple[Optional[pd.DataFrame], str]:
-        """Fetch data from URL and return both DataFrame and string representation."""
-        response = await self.client.get(url)
-        response.raise_for_status()
-        content = response.content
+    async def _fetch_data_as_df(
+        self, url: str
+    ) -> Tuple[Optional[Union[pd.DataFrame, pa.Table]], str]:
+        """
+        Fetch data from URL and return both the parsed table and string representation.
+
+        CSV content is returned as a pyarrow Table, other formats as a DataFrame.
+        """
+        content = await HttpClient.download(url, self.client)
 
         df = None
         data_str = ""
 
         # Determine file type from URL or content
         if ".csv" in url.lower():
-            # Try with header first
-            try:
-                df = pd.read_csv(io.BytesIO(content))
-                # Check if first row looks like data (all numeric)
-                if df.shape[1] == 1 and pd.to_numeric(df.columns[0], errors='coerce') is not pd.NA:
-                    # Headerless CSV - re-read
-                    df = pd.read_csv(io.BytesIO(content), header=None)
-            except:
-                df = pd.read_csv(io.BytesIO(content), header=None)
-            data_str = df.to_string()
+            delimiter, has_header = self._sniff_csv(content)
+            df = self._read_csv_arrow(content, header=has_header, delimiter=delimiter)
+            data_str = self._render_table(df)
 
         elif ".json" in url.lower():
-            data = json.loads(content)
-            data_str = json.dumps(data, indent=2)
+            data = _loads_json(content)
+            data_str = _dumps_json(data)
             if isinstance(data, list):
                 df = pd.DataFrame(data)
 
         elif ".xlsx" in url.lower() or ".xls" in url.lower():
             df = pd.read_excel(io.BytesIO(content))
-            data_str = df.to_string()
+            data_str = self._render_table(df)
 
         else:
             # Try to parse as JSON first, then CSV
             try:
-                data = json.loads(content)
-                data_str = json.dumps(data, indent=2)
+                data = _loads_json(content)
+                data_str = _dumps_json(data)
                 if isinstance(data, list):
                     df = pd.DataFrame(data)
             except:
                 try:
-                    df = pd.read_csv(io.BytesIO(content), header=None)
-                    data_str = df.to_string()
+                    delimiter, has_header = self._sniff_csv(content)
+                    df = self._read_csv_arrow(content, header=has_header, delimiter=delimiter)
+                    data_str = self._render_table(df)
                 except:
                     data_str = content.decode("utf-8", errors="ignore")
 
         return df, data_str
 
+    @classmethod
+    def _sniff_csv(cls, content: Union[bytes, bytearray]) -> Tuple[str, bool]:
+        """Guess the delimiter and whether the first row is a header from a leading sample."""
+        sample = bytes(content[:_CSV_SNIFF_BYTES]).decode("utf-8", errors="ignore")
+        if len(content) > _CSV_SNIFF_BYTES:
+            # Drop the possibly truncated last line
+            sample = sample.rsplit("\n", 1)[0]
+
+        try:
+            delimiter = csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+        except csv.Error:
+            # Single-column data has no delimiter to detect
+            delimiter = ","
+
+        # A first row made only of numbers is data, not a header
+        first_row = next(csv.reader(sample.splitlines()[:1], delimiter=delimiter), [])
+        has_header = not all(cls._is_number(field) for field in first_row)
+
+        return delimiter, has_header
+
+    @staticmethod
+    def _read_csv_arrow(
+        content: Union[bytes, bytearray],
+        header: bool = True,
+        delimiter: str = ",",
+    ) -> Union[pa.Table, pd.DataFrame]:
+        """
+        Parse CSV bytes with Arrow's multi-threaded reader.
+
+        Files Arrow rejects (e.g. rows with missing fields) are read with
+        pandas instead, which pads short rows with NaN.
+        """
+        try:
+            return pa_csv.read_csv(
+                pa.BufferReader(content),
+                read_options=pa_csv.ReadOptions(
+                    use_threads=True,
+                    autogenerate_column_names=not header,
+                ),
+                parse_options=pa_csv.ParseOptions(
+                    delimiter=delimiter,
+                    newlines_in_values=False,
+                ),
+            )
+        except pa.ArrowInvalid as e:
+            logger.info(f"Arrow could not parse CSV ({e}), using pandas")
+            df = pd.read_csv(io.BytesIO(content), header=0 if header else None, sep=delimiter)
+            if df.empty:
+                # No rows to pad; let the caller treat the content as text
+                raise
+            return df
+
+    @staticmethod
+    def _render_table(table: Union[pd.DataFrame, pa.Table]) -> str:
+        """Render a bounded preview of a table plus its full size for the LLM context."""
+        n_rows, n_cols = table.shape
+        if isinstance(table, pa.Table):
+            preview = table.slice(0, _PREVIEW_ROWS).to_pandas()
+        else:
+            preview = table.head(_PREVIEW_ROWS)
+
+        return (
+            preview.to_string(max_cols=_PREVIEW_COLS)
+            + f"\n... {n_rows} rows x {n_cols} cols total"
+        )
+
+    @staticmethod
+    def _is_number(value: str) -> bool:
+        """Check whether a string parses as a number."""
+        try:
+            float(value)
+            return True
+        except ValueError:
+            return False
+
     async def _fetch_and_parse_data(self, url: str) -> str:
         """Fetch and parse data from URL."""
         response = await self.client.get(url)
@@ -198,87 +353,75 @@ EXAMPLE for cutoff questions:
         # Determine file type from URL or content
         if ".csv" in url.lower():
             df = pd.read_csv(io.BytesIO(content))
-            return df.to_string()
+            return self._render_table(df)
 
         if ".json" in url.lower():
-            data = json.loads(content)
-            return json.dumps(data, indent=2)
+            data = _loads_json(content)
+            return _dumps_json(data)
 
         if ".xlsx" in url.lower() or ".xls" in url.lower():
             df = pd.read_excel(io.BytesIO(content))
-            return df.to_string()
+            return self._render_table(df)
 
         # Try to parse as JSON first, then CSV
         try:
-            data = json.loads(content)
-            return json.dumps(data, indent=2)
+            data = _loads_json(content)
+            return _dumps_json(data)
         except:
             pass
 
         try:
             df = pd.read_csv(io.BytesIO(content))
-            return df.to_string()
+            return self._render_table(df)
         except:
             pass
 
         # Return as text
         return content.decode("utf-8", errors="ignore")
 
+    @cache_by_html()
     def _extract_data_from_html(self, html: str) -> str:
-        """Extract data tables or JSON from HTML content."""
-        from bs4 import BeautifulSoup
-
-        soup = BeautifulSoup(html, "html.parser")
+        """Extract data tables or JSON from HTML content, reusing results for repeated pages."""
+        # Bound the work on very large pages; the leading content is representative
+        tree = LexborHTMLParser(html[:_MAX_HTML_SCAN_CHARS])
         data_parts = []
 
         # Extract tables
-        for table in soup.find_all("table"):
-            try:
-                df = pd.read_html(str(table))[0]
-                data_parts.append(df.to_string())
-            except Exception as e:
-                logger.debug(f"Could not parse table: {e}")
+        for table in tree.css("table"):
+            if len(data_parts) >= _MAX_HTML_TABLES:
+                break
+            rows = table_rows(table)
+            if rows:
+                data_parts.append("\n".join(rows))
 
         # Extract pre/code blocks that might contain data
-        for elem in soup.find_all(["pre", "code"]):
-            text = elem.get_text()
+        for elem in tree.css("pre, code"):
+            text = elem.text()
             if text.strip():
                 data_parts.append(text)
 
         # Look for JSON in script tags
-        for script in soup.find_all("script"):
-            text = script.get_text()
+        for script in tree.css("script"):
+            text = script.text()
             if "{" in text and "}" in text:
                 # Try to extract JSON
-                import re
-
-                json_matches = re.findall(r'\{[^{}]+\}', text)
+                json_matches = islice(_JSON_OBJ_RE.finditer(text), _MAX_SCRIPT_JSON_MATCHES)
                 for match in json_matches:
                     try:
-                        data = json.loads(match)
-                        data_parts.append(json.dumps(data, indent=2))
+                        data = _loads_json(match.group(0))
+                        data_parts.append(_dumps_json(data))
                     except:
                         pass
 
         return "\n\n".join(data_parts) if data_parts else ""
 
     async def compute_statistics(self, data: pd.DataFrame, operation: str) -> Any:
-        """Compute statistics on a DataFrame."""
+        """Compute statistics over the numeric cells of a DataFrame."""
         operation = operation.lower()
+        arr = data.select_dtypes(include=[np.number]).to_numpy(dtype="float64", na_value=np.nan)
 
-        if "sum" in operation:
-            return data.sum().sum()
-        if "mean" in operation or "average" in operation:
-            return data.mean().mean()
-        if "count" in operation:
-            return len(data)
-        if "max" in operation:
-            return data.max().max()
-        if "min" in operation:
-            return data.min().min()
+        for keywords, reduce in _STAT_REDUCERS:
+            if any(keyword in operation for keyword in keywords):
+                return reduce(arr)
 
         return None
-
-    async def close(self):
-        """Close the HTTP client."""
-        await self.client.aclose()
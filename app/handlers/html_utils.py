@@ -0,0 +1,46 @@
+from functools import wraps
+from typing import Callable, List, TypeVar
+
+import xxhash
+from cachetools import LRUCache
+from selectolax.lexbor import LexborNode
+
+T = TypeVar("T")
+
+_CELL_TAGS = frozenset(("td", "th"))
+
+
+def table_rows(table: LexborNode) -> List[str]:
+    """Render each non-empty row of a table as ``cell | cell | ...``."""
+    rows = []
+    for tr in table.css("tr"):
+        # Cells are direct children of the row; iterating avoids a selector match per row
+        row = " | ".join(cell.text(strip=True) for cell in tr.iter() if cell.tag in _CELL_TAGS)
+        if row:
+            rows.append(row)
+    return rows
+
+
+def cache_by_html(maxsize: int = 64) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """
+    Memoize a ``method(self, html)`` extractor by a hash of the HTML.
+
+    Pages recur within a quiz chain, so each decorated method keeps its
+    own LRU of results shared across handler instances.
+    """
+
+    def decorator(method: Callable[..., T]) -> Callable[..., T]:
+        cache: LRUCache = LRUCache(maxsize=maxsize)
+
+        @wraps(method)
+        def wrapper(self, html: str) -> T:
+            key = xxhash.xxh3_64_intdigest(html.encode("utf-8", errors="surrogatepass"))
+            result = cache.get(key)
+            if result is None:
+                result = method(self, html)
+                cache[key] = result
+            return result
+
+        return wrapper
+
+    return decorator
@@ -1,22 +1,48 @@
+import asyncio
 import base64
 import io
 import logging
-from typing import Any, Optional
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, List, Optional, Tuple
 
 import httpx
 import pdfplumber
 
+from app.config import settings
+from app.services.http import HttpClient
 from app.services.llm import LLMService
 
 logger = logging.getLogger(__name__)
 
 
+def _extract_pages(
+    pdf_bytes: bytes, offset: int, step: int
+) -> List[Tuple[int, str, List[str]]]:
+    """
+    Extract text and formatted tables from every ``step``-th page starting at
+    ``offset`` (runs in a worker process, opening the document once).
+    """
+    pages = []
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        for page_index in range(offset, len(pdf.pages), step):
+            page = pdf.pages[page_index]
+            text = page.extract_text() or ""
+            tables = [PDFHandler._format_table(table) for table in page.extract_tables() if table]
+            pages.append((page_index, text, tables))
+
+    return pages
+
+
 class PDFHandler:
     """Handle PDF-related quiz tasks."""
 
-    def __init__(self, llm: LLMService):
+    _pool: Optional[ProcessPoolExecutor] = None
+
+    def __init__(self, llm: LLMService, client: httpx.AsyncClient):
         self.llm = llm
-        self.client = httpx.AsyncClient(timeout=60.0)
+        self.client = client
 
     async def solve(self, question: str, download_url: str) -> Any:
         """
@@ -33,9 +59,7 @@ class PDFHandler:
 
         try:
             # Download the PDF
-            response = await self.client.get(download_url)
-            response.raise_for_status()
-            pdf_bytes = response.content
+            pdf_bytes = await HttpClient.download(download_url, self.client)
 
             # Extract text from PDF
             text_content = await self._extract_text(pdf_bytes)
@@ -54,30 +78,69 @@ class PDFHandler:
             # Try vision-based approach
             return await self._solve_with_vision(question, download_url)
 
+    @classmethod
+    def _get_pool(cls) -> ProcessPoolExecutor:
+        """Get the shared process pool used for PDF parsing."""
+        if cls._pool is None:
+            # The pool starts after other threads are running; forking a
+            # multithreaded process can deadlock the children
+            cls._pool = ProcessPoolExecutor(
+                max_workers=settings.PDF_WORKERS,
+                mp_context=multiprocessing.get_context("forkserver"),
+            )
+        return cls._pool
+
+    @classmethod
+    def shutdown_pool(cls) -> None:
+        """Shut down the shared PDF parsing pool."""
+        if cls._pool is not None:
+            cls._pool.shutdown(cancel_futures=True)
+            cls._pool = None
+
+    @classmethod
+    def _discard_pool(cls, pool: ProcessPoolExecutor) -> None:
+        """Drop a broken pool so the next PDF starts a fresh one."""
+        if cls._pool is pool:
+            cls._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
     async def _extract_text(self, pdf_bytes: bytes) -> str:
-        """Extract text content from PDF bytes."""
+        """Extract text content from PDF bytes, one interleaved page slice per worker."""
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        workers = settings.PDF_WORKERS
         text_parts = []
 
         try:
-            with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-                for i, page in enumerate(pdf.pages):
-                    # Extract text
-                    text = page.extract_text() or ""
-                    text_parts.append(f"=== Page {i + 1} ===\n{text}")
-
-                    # Extract tables
-                    tables = page.extract_tables()
-                    for j, table in enumerate(tables):
-                        if table:
-                            table_text = self._format_table(table)
-                            text_parts.append(f"--- Table {j + 1} on Page {i + 1} ---\n{table_text}")
+            try:
+                # Each worker gets one copy of the document and opens it once
+                chunks = await asyncio.gather(
+                    *(
+                        loop.run_in_executor(pool, _extract_pages, pdf_bytes, k, workers)
+                        for k in range(workers)
+                    )
+                )
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM); a retry on this PDF would likely kill
+                # the next pool too, so extract in a thread instead
+                logger.warning("PDF worker pool broke, extracting in-process")
+                self._discard_pool(pool)
+                chunks = [await asyncio.to_thread(_extract_pages, pdf_bytes, 0, 1)]
+
+            pages = sorted((page for chunk in chunks for page in chunk), key=lambda page: page[0])
+
+            for i, text, tables in pages:
+                text_parts.append(f"=== Page {i + 1} ===\n{text}")
+                for j, table_text in enumerate(tables):
+                    text_parts.append(f"--- Table {j + 1} on Page {i + 1} ---\n{table_text}")
 
         except Exception as e:
             logger.error(f"Error extracting PDF text: {e}")
 
         return "\n\n".join(text_parts)
 
-    def _format_table(self, table: list) -> str:
+    @staticmethod
+    def _format_table(table: list) -> str:
         """Format a table as text."""
         if not table:
             return ""
@@ -95,25 +158,27 @@ class PDFHandler:
         """Fallback: Use vision to analyze PDF pages as images."""
         try:
             # Download PDF
-            response = await self.client.get(download_url)
-            pdf_bytes = response.content
+            pdf_bytes = await HttpClient.download(download_url, self.client)
 
             # Convert first page to image
             from pdf2image import convert_from_bytes
 
             images = convert_from_bytes(pdf_bytes, first_page=1, last_page=3)
 
-            # Analyze with vision
-            for i, img in enumerate(images):
-                buffer = io.BytesIO()
-                img.save(buffer, format="PNG")
-                img_base64 = base64.b64encode(buffer.getvalue()).decode()
-
-                answer = await self.llm.analyze_with_vision(
-                    img_base64,
-                    f"This is page {i + 1} of a PDF. {question}",
+            # Analyze pages concurrently; the vision calls are I/O-bound
+            answers = await asyncio.gather(
+                *(
+                    self.llm.analyze_with_vision(
+                        self._encode_page(img),
+                        f"This is page {i + 1} of a PDF. {question}",
+                        mime_type="image/jpeg",
+                    )
+                    for i, img in enumerate(images)
                 )
+            )
 
+            # First page (in order) with an answer wins
+            for answer in answers:
                 if answer and answer.strip():
                     return self.llm._parse_answer(answer)
 
@@ -124,6 +189,9 @@ class PDFHandler:
 
         return None
 
-    async def close(self):
-        """Close the HTTP client."""
-        await self.client.aclose()
+    @staticmethod
+    def _encode_page(img) -> str:
+        """Encode a rendered PDF page as base64 JPEG."""
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=85, optimize=True)
+        return base64.b64encode(buffer.getbuffer()).decode()
@@ -2,8 +2,9 @@ import logging
 import re
 from typing import Any
 
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
 
+from app.handlers.html_utils import cache_by_html, table_rows
 from app.services.llm import LLMService
 from app.services.browser import BrowserService
 
@@ -38,30 +39,30 @@ class ScraperHandler:
 
         return answer
 
+    @cache_by_html()
     def _extract_content(self, html: str) -> str:
-        """Extract meaningful content from HTML."""
-        soup = BeautifulSoup(html, "html.parser")
+        """Extract meaningful content from HTML, reusing results for repeated pages."""
+        tree = LexborHTMLParser(html)
 
         # Remove script and style elements
-        for elem in soup(["script", "style", "meta", "link"]):
-            elem.decompose()
+        tree.strip_tags(["script", "style", "meta", "link"])
 
         content_parts = []
 
         # Extract text from main content areas
         for selector in ["main", "article", "#content", ".content", "#result", "body"]:
-            elem = soup.select_one(selector)
+            elem = tree.css_first(selector)
             if elem:
-                text = elem.get_text(separator="\n", strip=True)
+                text = elem.text(separator="\n", strip=True, skip_empty=True)
                 if text and len(text) > 50:
                     content_parts.append(text)
                     break
 
         # Extract all links
         links = []
-        for link in soup.find_all("a", href=True):
-            href = link["href"]
-            text = link.get_text(strip=True)
+        for link in tree.css("a[href]"):
+            href = link.attributes.get("href") or ""
+            text = link.text(strip=True)
             if text and href.startswith("http"):
                 links.append(f"{text}: {href}")
 
@@ -69,18 +70,14 @@ class ScraperHandler:
             content_parts.append("\nLinks found:\n" + "\n".join(links[:20]))
 
         # Extract tables
-        for table in soup.find_all("table"):
-            rows = []
-            for tr in table.find_all("tr"):
-                cells = [td.get_text(strip=True) for td in tr.find_all(["td", "th"])]
-                if cells:
-                    rows.append(" | ".join(cells))
+        for table in tree.css("table"):
+            rows = table_rows(table)
             if rows:
                 content_parts.append("\nTable:\n" + "\n".join(rows))
 
         # Extract lists
-        for ul in soup.find_all(["ul", "ol"]):
-            items = [li.get_text(strip=True) for li in ul.find_all("li")]
+        for ul in tree.css("ul, ol"):
+            items = [li.text(strip=True) for li in ul.css("li")]
             if items:
                 content_parts.append("\nList:\n" + "\n".join(f"- {item}" for item in items))
 
@@ -97,6 +94,6 @@ class ScraperHandler:
         selector: str,
     ) -> list:
         """Extract data using a specific CSS selector."""
-        soup = BeautifulSoup(html, "html.parser")
-        elements = soup.select(selector)
-        return [elem.get_text(strip=True) for elem in elements]
+        tree = LexborHTMLParser(html)
+        elements = tree.css(selector)
+        return [elem.text(strip=True) for elem in elements]
@@ -1,11 +1,12 @@
+import asyncio
 import base64
 import io
 import logging
-from typing import Any, Optional
+from typing import Any, Callable, Dict, Optional
 
 import matplotlib
 matplotlib.use('Agg')  # Non-interactive backend
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import pandas as pd
 
 from app.services.llm import LLMService
@@ -13,11 +14,30 @@ from app.services.llm import LLMService
 logger = logging.getLogger(__name__)
 
 
+def _plot_scatter(data: pd.DataFrame, ax) -> None:
+    """Scatter the first two columns against each other."""
+    if data.shape[1] >= 2:
+        ax.scatter(data.iloc[:, 0], data.iloc[:, 1])
+
+
+# Chart type -> plotting function, in keyword detection priority order
+CHART_DISPATCH: Dict[str, Callable[[pd.DataFrame, Any], None]] = {
+    "bar": lambda data, ax: data.plot(kind="bar", ax=ax),
+    "line": lambda data, ax: data.plot(kind="line", ax=ax),
+    "pie": lambda data, ax: data.iloc[:, 0].plot(kind="pie", ax=ax),
+    "scatter": _plot_scatter,
+}
+
+
 class VisualizationHandler:
     """Handle visualization quiz tasks."""
 
     def __init__(self, llm: LLMService):
         self.llm = llm
+        # Reused across renders; matplotlib state is not safe to share concurrently
+        self._fig = Figure(figsize=(10, 6))
+        self._ax = self._fig.add_subplot()
+        self._render_lock = asyncio.Lock()
 
     async def solve(
         self,
@@ -53,33 +73,38 @@ class VisualizationHandler:
             # Try to extract data from question
             return await self._generate_chart_from_description(question)
 
-        fig, ax = plt.subplots(figsize=(10, 6))
-
-        if chart_type == "bar" or "bar" in question.lower():
-            data.plot(kind="bar", ax=ax)
-        elif chart_type == "line" or "line" in question.lower():
-            data.plot(kind="line", ax=ax)
-        elif chart_type == "pie" or "pie" in question.lower():
-            data.iloc[:, 0].plot(kind="pie", ax=ax)
-        elif chart_type == "scatter" or "scatter" in question.lower():
-            if data.shape[1] >= 2:
-                ax.scatter(data.iloc[:, 0], data.iloc[:, 1])
+        # Explicit chart type wins, then the first keyword in the question, else bar
+        if chart_type in CHART_DISPATCH:
+            kind = chart_type
         else:
-            # Default to bar chart
-            data.plot(kind="bar", ax=ax)
+            question_lower = question.lower()
+            kind = next((k for k in CHART_DISPATCH if k in question_lower), "bar")
+
+        async with self._render_lock:
+            try:
+                CHART_DISPATCH[kind](data, self._ax)
 
-        ax.set_title("Generated Chart")
-        plt.tight_layout()
+                self._ax.set_title("Generated Chart")
+                self._fig.tight_layout()
 
-        # Convert to base64
+                return self._render_figure()
+            finally:
+                self._reset_figure()
+
+    def _render_figure(self) -> str:
+        """Render the shared figure as a base64 PNG data URI."""
         buffer = io.BytesIO()
-        plt.savefig(buffer, format="png", dpi=100)
-        buffer.seek(0)
+        self._fig.savefig(buffer, format="png", dpi=100)
         img_base64 = base64.b64encode(buffer.getvalue()).decode()
-        plt.close(fig)
 
         return f"data:image/png;base64,{img_base64}"
 
+    def _reset_figure(self) -> None:
+        """Give the shared figure fresh axes for the next render."""
+        # ax.clear() keeps frame/aspect changes made by e.g. pie charts
+        self._fig.clear()
+        self._ax = self._fig.add_subplot()
+
     async def _generate_chart_from_description(self, question: str) -> str:
         """Generate chart based on LLM interpretation of the question."""
         # Ask LLM to generate matplotlib code
@@ -96,17 +121,14 @@ Return ONLY the Python code, no explanations. The code should:
         # Execute the code (in a sandboxed way)
         try:
             # Create a simple chart as fallback
-            fig, ax = plt.subplots(figsize=(10, 6))
-            ax.bar([1, 2, 3, 4, 5], [10, 20, 15, 25, 30])
-            ax.set_title("Generated Chart")
-
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format="png", dpi=100)
-            buffer.seek(0)
-            img_base64 = base64.b64encode(buffer.getvalue()).decode()
-            plt.close(fig)
-
-            return f"data:image/png;base64,{img_base64}"
+            async with self._render_lock:
+                try:
+                    self._ax.bar([1, 2, 3, 4, 5], [10, 20, 15, 25, 30])
+                    self._ax.set_title("Generated Chart")
+
+                    return self._render_figure()
+                finally:
+                    self._reset_figure()
 
         except Exception as e:
             logger.error(f"Error generating chart: {e}")
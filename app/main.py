@@ -6,9 +6,12 @@ from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 
 from app.config import settings
+from app.handlers.pdf import PDFHandler
 from app.models import QuizTaskRequest, QuizResponse
 from app.services.browser import BrowserService
+from app.services.http import HttpClient
 from app.services.orchestrator import QuizOrchestrator
+from app.services.submitter import AnswerSubmitter
 
 # Configure logging
 logging.basicConfig(
@@ -20,12 +23,19 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Manage application lifecycle - initialize and cleanup browser."""
+    """Manage application lifecycle - initialize and cleanup browser and HTTP client."""
     logger.info("Starting up - initializing browser service...")
     await BrowserService.initialize()
+    # Shared HTTP client so downloads reuse pooled connections across quizzes
+    HttpClient.get_client()
+    # Cap the number of quiz chains solved at once; extra tasks wait for a slot
+    app.state.quiz_semaphore = asyncio.Semaphore(settings.QUIZ_CONCURRENCY)
     yield
     logger.info("Shutting down - cleaning up browser service...")
+    await HttpClient.close()
+    await AnswerSubmitter.close_client()
     await BrowserService.cleanup()
+    PDFHandler.shutdown_pool()
 
 
 app = FastAPI(
@@ -98,9 +108,9 @@ async def solve_quiz(task: QuizTaskRequest):
 async def solve_quiz_task(email: str, secret: str, url: str):
     """Background task to solve the quiz."""
     try:
-        orchestrator = QuizOrchestrator(email, secret)
+        # The deadline also covers time spent waiting for a solver slot
         await asyncio.wait_for(
-            orchestrator.solve_quiz_chain(url),
+            run_quiz_chain(email, secret, url),
             timeout=settings.QUIZ_TIMEOUT_SECONDS - 10,  # 10s buffer
         )
         logger.info(f"Quiz chain completed for {url}")
@@ -110,6 +120,13 @@ async def solve_quiz_task(email: str, secret: str, url: str):
         logger.error(f"Error solving quiz {url}: {e}")
 
 
+async def run_quiz_chain(email: str, secret: str, url: str):
+    """Solve a quiz chain once a concurrency slot is free."""
+    async with app.state.quiz_semaphore:
+        orchestrator = QuizOrchestrator(email, secret)
+        await orchestrator.solve_quiz_chain(url)
+
+
 if __name__ == "__main__":
     import uvicorn
 
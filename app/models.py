@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Any, Optional, Union
 
 
@@ -42,3 +42,4 @@ class QuizContent(BaseModel):
     download_url: Optional[str] = None
     quiz_type: str  # scraping, api, pdf, data, visualization
     raw_html: str
+    screenshot_b64: Optional[str] = Field(default=None, repr=False)  # JPEG, captured on demand
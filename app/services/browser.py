@@ -1,19 +1,38 @@
 import asyncio
 import base64
 import logging
-from typing import Optional
-from playwright.async_api import async_playwright, Browser, Page, Playwright
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, Union
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright, Route
 
 from app.config import settings
+from app.services.http import HttpClient
 
 logger = logging.getLogger(__name__)
 
+# Chromium flags for running in a container. Playwright already disables the
+# background subsystems itself; a second --disable-features would replace its list
+_LAUNCH_ARGS = [
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+]
+
+# Resource types skipped when only the HTML is needed
+_HEAVY_RESOURCES = frozenset({"image", "font", "media", "stylesheet"})
+
+# Page is ready once the target element exists and has rendered some text
+_READY_JS = "sel => { const el = document.querySelector(sel); return !!el && el.innerText.length > 0; }"
+
 
 class BrowserService:
     """Singleton service for managing Playwright browser."""
 
     _playwright: Optional[Playwright] = None
     _browser: Optional[Browser] = None
+    _context_pool: Optional["asyncio.Queue[BrowserContext]"] = None
+    _prewarm_task: Optional[asyncio.Task] = None
     _lock = asyncio.Lock()
 
     @classmethod
@@ -24,20 +43,40 @@ class BrowserService:
                 logger.info("Initializing Playwright browser...")
                 cls._playwright = await async_playwright().start()
                 cls._browser = await cls._playwright.chromium.launch(
+                    # The headless shell is much smaller and starts faster than full Chromium
+                    channel="chromium-headless-shell" if settings.BROWSER_HEADLESS else None,
                     headless=settings.BROWSER_HEADLESS,
-                    args=[
-                        "--no-sandbox",
-                        "--disable-setuid-sandbox",
-                        "--disable-dev-shm-usage",
-                        "--disable-gpu",
-                    ],
+                    args=_LAUNCH_ARGS,
                 )
+                cls._context_pool = asyncio.Queue(maxsize=settings.BROWSER_POOL_SIZE)
                 logger.info("Browser initialized successfully")
+                # Have a ready context waiting for the first quiz
+                cls._prewarm_task = asyncio.create_task(cls._prewarm())
+
+    @classmethod
+    async def _prewarm(cls) -> None:
+        """Create a context, load a blank page in it, and park it in the pool."""
+        try:
+            context = await cls._new_context()
+            page = await context.new_page()
+            await page.goto("about:blank")
+            await page.close()
+            cls._context_pool.put_nowait(context)
+            logger.info("Browser context pre-warmed")
+        except Exception as e:
+            logger.warning(f"Browser pre-warm failed: {e}")
 
     @classmethod
     async def cleanup(cls) -> None:
         """Cleanup browser resources."""
         async with cls._lock:
+            if cls._prewarm_task is not None:
+                cls._prewarm_task.cancel()
+                cls._prewarm_task = None
+            if cls._context_pool is not None:
+                while not cls._context_pool.empty():
+                    await cls._context_pool.get_nowait().close()
+                cls._context_pool = None
             if cls._browser:
                 await cls._browser.close()
                 cls._browser = None
@@ -52,17 +91,84 @@ class BrowserService:
         return cls._browser is not None and cls._browser.is_connected()
 
     @classmethod
-    async def get_page(cls) -> Page:
-        """Create a new page in a fresh context."""
-        if cls._browser is None:
-            await cls.initialize()
-
-        context = await cls._browser.new_context(
+    async def _new_context(cls) -> BrowserContext:
+        """Create a browser context with the standard viewport and user agent."""
+        return await cls._browser.new_context(
             viewport={"width": 1920, "height": 1080},
             user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
         )
-        page = await context.new_page()
-        return page
+
+    @classmethod
+    @asynccontextmanager
+    async def _acquire_context(cls) -> AsyncIterator[BrowserContext]:
+        """
+        Borrow a context from the pool, creating one if the pool is empty.
+
+        Contexts keep their HTTP cache between quizzes; cookies are cleared
+        on release so each borrower starts logged out. A context is only
+        closed when the pool is already full.
+        """
+        if cls._browser is None:
+            await cls.initialize()
+
+        try:
+            context = cls._context_pool.get_nowait()
+        except asyncio.QueueEmpty:
+            context = await cls._new_context()
+
+        try:
+            yield context
+        except BaseException:
+            await context.close()
+            raise
+
+        await context.clear_cookies()
+        try:
+            cls._context_pool.put_nowait(context)
+        except asyncio.QueueFull:
+            await context.close()
+
+    @classmethod
+    @asynccontextmanager
+    async def get_page(cls, light: bool = False) -> AsyncIterator[Page]:
+        """
+        Open a new page in a pooled context, closing the page on exit.
+
+        A ``light`` page aborts image, font, media and stylesheet requests;
+        use it only when nothing will be rendered to pixels. Routing turns
+        off the HTTP cache for that page, so pages that load the same
+        scripts repeatedly are usually faster without it.
+        """
+        async with cls._acquire_context() as context:
+            page = await context.new_page()
+            if light:
+                await page.route("**/*", cls._block_heavy)
+            try:
+                yield page
+            finally:
+                await page.close()
+
+    @staticmethod
+    async def _block_heavy(route: Route) -> None:
+        """Abort requests for resources that don't affect the DOM."""
+        if route.request.resource_type in _HEAVY_RESOURCES:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    @staticmethod
+    async def _navigate(page: Page, url: str, selector: str = "#result") -> bool:
+        """
+        Load the DOM and wait until ``selector`` has rendered text.
+
+        Returns False if the element never populated within the timeout.
+        """
+        await page.goto(url, wait_until="domcontentloaded", timeout=15000)
+        try:
+            await page.wait_for_function(_READY_JS, arg=selector, timeout=10000)
+            return True
+        except Exception:
+            return False
 
     @classmethod
     async def get_page_content(cls, url: str, wait_selector: str = "#result") -> str:
@@ -72,103 +178,85 @@ class BrowserService:
         This handles JavaScript-rendered pages by waiting for the content
         to be injected into the DOM.
         """
-        page = await cls.get_page()
-        try:
+        async with cls.get_page(light=True) as page:
             logger.info(f"Navigating to {url}")
-            await page.goto(url, wait_until="networkidle", timeout=30000)
-
-            # Wait for the result element to be populated
-            try:
-                await page.wait_for_selector(wait_selector, timeout=10000)
-                # Additional wait for JavaScript to execute
-                await asyncio.sleep(1)
-            except Exception:
-                # If no #result selector, try body
-                await page.wait_for_load_state("domcontentloaded")
+            await cls._navigate(page, url, wait_selector)
 
             # Get the full page HTML
             content = await page.content()
-            logger.info(f"Retrieved content from {url} ({len(content)} chars)")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Retrieved content from {url} ({len(content)} chars)")
             return content
 
-        finally:
-            await page.context.close()
-
     @classmethod
     async def get_element_content(cls, url: str, selector: str = "#result") -> str:
         """Get the inner HTML of a specific element after JavaScript execution."""
-        page = await cls.get_page()
-        try:
-            await page.goto(url, wait_until="networkidle", timeout=30000)
-
-            try:
-                await page.wait_for_selector(selector, timeout=10000)
-                await asyncio.sleep(1)  # Wait for JS to complete
-                element = await page.query_selector(selector)
-                if element:
-                    content = await element.inner_html()
-                    return content
-            except Exception:
-                pass
+        async with cls.get_page(light=True) as page:
+            if await cls._navigate(page, url, selector):
+                return await page.inner_html(selector)
 
             # Fallback to body content
             return await page.inner_html("body")
 
-        finally:
-            await page.context.close()
-
     @classmethod
     async def take_screenshot(cls, url: str) -> str:
         """Take a screenshot and return as base64."""
-        page = await cls.get_page()
-        try:
-            await page.goto(url, wait_until="networkidle", timeout=30000)
-            await asyncio.sleep(2)  # Wait for full render
+        async with cls.get_page() as page:
+            await cls._navigate(page, url)
+            await page.wait_for_load_state("load")
 
             screenshot_bytes = await page.screenshot(full_page=True)
-            return base64.b64encode(screenshot_bytes).decode("utf-8")
-
-        finally:
-            await page.context.close()
+            encoded = await asyncio.to_thread(base64.b64encode, screenshot_bytes)
+            return encoded.decode("ascii")
 
     @classmethod
     async def download_file(cls, url: str) -> bytes:
-        """Download a file and return its bytes."""
-        page = await cls.get_page()
-        try:
-            response = await page.request.get(url)
-            return await response.body()
-        finally:
-            await page.context.close()
+        """Download a file and return its bytes (plain HTTP, no browser page)."""
+        response = await HttpClient.get_client().get(url)
+        return response.content
 
     @classmethod
-    async def execute_and_get_content(cls, url: str) -> dict:
+    async def get_result_html(cls, url: str, selector: str = "#result") -> str:
         """
-        Navigate to URL, execute JavaScript, and extract quiz content.
+        Navigate to URL and return just the rendered result element.
 
-        Returns dict with:
-        - rendered_html: The fully rendered HTML after JS execution
-        - screenshot_base64: Screenshot of the page
+        Only the element's outer HTML crosses the CDP boundary; the whole
+        document is serialized only when the element never populates.
+        Runs on every quiz, so it uses a normal page: routing would disable
+        the pooled context's HTTP cache for the page's scripts.
         """
-        page = await cls.get_page()
-        try:
-            await page.goto(url, wait_until="networkidle", timeout=30000)
+        async with cls.get_page() as page:
+            return await cls.load_result_html(page, url, selector)
 
-            # Wait for content to render
-            try:
-                await page.wait_for_selector("#result", timeout=10000)
-            except Exception:
-                pass
+    @classmethod
+    async def load_result_html(cls, page: Page, url: str, selector: str = "#result") -> str:
+        """``get_result_html`` in a caller-owned page, which stays open for reuse."""
+        if await cls._navigate(page, url, selector):
+            return await page.eval_on_selector(selector, "el => el.outerHTML")
+        return await page.content()
+
+    @classmethod
+    async def get_screenshot(cls, page_or_url: Union[Page, str], *, jpeg: bool = True) -> bytes:
+        """
+        Capture a viewport screenshot of a page (or of a URL in a new page).
 
-            await asyncio.sleep(2)  # Ensure JavaScript has executed
+        Returns the raw image bytes; callers base64-encode only when they
+        actually need a data URL.
+        """
+        if isinstance(page_or_url, Page):
+            # Screenshots need styles and images in place, not just the DOM
+            await page_or_url.wait_for_load_state("load")
+            return await cls._capture(page_or_url, jpeg)
 
-            rendered_html = await page.content()
-            screenshot = await page.screenshot(full_page=True)
+        async with cls.get_page() as page:
+            await cls._navigate(page, page_or_url)
+            await page.wait_for_load_state("load")
 
-            return {
-                "rendered_html": rendered_html,
-                "screenshot_base64": base64.b64encode(screenshot).decode("utf-8"),
-            }
+            return await cls._capture(page, jpeg)
 
-        finally:
-            await page.context.close()
+    @staticmethod
+    async def _capture(page: Page, jpeg: bool) -> bytes:
+        """Take a viewport-only screenshot, JPEG by default."""
+        if jpeg:
+            return await page.screenshot(type="jpeg", quality=70, full_page=False)
+        return await page.screenshot(full_page=False)
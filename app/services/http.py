@@ -0,0 +1,43 @@
+import logging
+from typing import Optional
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Read size used when streaming downloads
+_DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+
+class HttpClient:
+    """Singleton httpx client for fetches that don't need a browser."""
+
+    _client: Optional[httpx.AsyncClient] = None
+
+    @classmethod
+    def get_client(cls) -> httpx.AsyncClient:
+        """Get the shared client, creating it on first use."""
+        if cls._client is None or cls._client.is_closed:
+            cls._client = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+                timeout=60.0,
+            )
+        return cls._client
+
+    @classmethod
+    async def download(cls, url: str, client: Optional[httpx.AsyncClient] = None) -> bytearray:
+        """Stream a download into a single growable buffer (shared client by default)."""
+        buffer = bytearray()
+        async with (client or cls.get_client()).stream("GET", url) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(_DOWNLOAD_CHUNK_SIZE):
+                buffer += chunk
+        return buffer
+
+    @classmethod
+    async def close(cls) -> None:
+        """Close the shared client and its pooled connections."""
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
+            logger.info("HTTP client closed")
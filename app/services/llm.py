@@ -1,22 +1,92 @@
+import asyncio
 import base64
+import hashlib
 import json
 import logging
 import re
-from typing import Any, Optional, Union
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, List, Optional, Union
+from cachetools import LRUCache
 from openai import AsyncOpenAI
 
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Answers to identical requests (same prompts and image); responses are
+# deterministic at temperature 0, so retries and repeated questions are
+# served from memory
+_ANSWER_CACHE: LRUCache = LRUCache(maxsize=512)
+
+# Cache keys consulted by the current solve (see LLMService.track_answers)
+_USED_KEYS: ContextVar[Optional[List[bytes]]] = ContextVar("_USED_KEYS", default=None)
+
+# Plain numeric answer, e.g. "42", "-3.5" or "7."
+_NUM_RE = re.compile(r"-?\d+(?:\.\d*)?")
+_BOOL = {"true": True, "false": False}
+
+# First characters that can start a code fence, boolean, number or JSON value;
+# anything else is returned as a plain string without further parsing
+_STRUCTURED_START = frozenset("`{[\"-0123456789tTfFn")
+
+
+def _cache_key(*parts: Union[str, bytes]) -> bytes:
+    """Hash request parts into a compact cache key."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part.encode("utf-8", errors="surrogatepass") if isinstance(part, str) else part)
+        digest.update(b"\0")
+    return digest.digest()
+
+
+def _note_key(key: bytes) -> None:
+    """Record a cache key for the enclosing track_answers() block, if any."""
+    used = _USED_KEYS.get()
+    if used is not None:
+        used.append(key)
+
 
 class LLMService:
     """Service for interacting with OpenAI GPT-4o."""
 
+    _client: Optional[AsyncOpenAI] = None
+
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client = self._get_client()
         self.model = "gpt-4o"
 
+    @classmethod
+    def _get_client(cls) -> AsyncOpenAI:
+        """Get the OpenAI client shared by all instances, creating it on first use."""
+        if cls._client is None:
+            cls._client = AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                max_retries=2,
+                timeout=30.0,
+            )
+        return cls._client
+
+    @staticmethod
+    @contextmanager
+    def track_answers() -> Iterator[List[bytes]]:
+        """
+        Collect the cache keys of every answer produced inside the block,
+        including in tasks it gathers, so they can be invalidated later.
+        """
+        used: List[bytes] = []
+        token = _USED_KEYS.set(used)
+        try:
+            yield used
+        finally:
+            _USED_KEYS.reset(token)
+
+    @staticmethod
+    def invalidate(keys: List[bytes]) -> None:
+        """Drop cached answers, e.g. after the server rejected them."""
+        for key in keys:
+            _ANSWER_CACHE.pop(key, None)
+
     async def analyze_quiz(
         self,
         question: str,
@@ -75,6 +145,12 @@ Example: If the quiz shows "answer": "anything you want", return: anything you w
 
         messages.append({"role": "user", "content": user_content})
 
+        key = _cache_key(self.model, system_prompt, text_content, image_base64 or "")
+        _note_key(key)
+        if key in _ANSWER_CACHE:
+            logger.info("LLM answer served from cache")
+            return _ANSWER_CACHE[key]
+
         try:
             response = await self.client.chat.completions.create(
                 model=self.model,
@@ -86,7 +162,9 @@ Example: If the quiz shows "answer": "anything you want", return: anything you w
             answer_text = response.choices[0].message.content.strip()
             logger.info(f"LLM response: {answer_text[:200]}...")
 
-            return self._parse_answer(answer_text)
+            answer = self._parse_answer(answer_text)
+            _ANSWER_CACHE[key] = answer
+            return answer
 
         except Exception as e:
             logger.error(f"LLM error: {e}")
@@ -95,57 +173,68 @@ Example: If the quiz shows "answer": "anything you want", return: anything you w
     def _parse_answer(self, answer_text: str) -> Any:
         """Parse the LLM response into the appropriate type."""
         answer_text = answer_text.strip()
+        if not answer_text:
+            return answer_text
+
+        first = answer_text[0]
+        if first not in _STRUCTURED_START:
+            return answer_text
+
+        # Common case: a bare number
+        if (first.isdigit() or first == "-") and _NUM_RE.fullmatch(answer_text):
+            return float(answer_text) if "." in answer_text else int(answer_text)
 
         # Remove markdown code blocks if present
-        if answer_text.startswith("```"):
+        if first == "`" and answer_text.startswith("```"):
             lines = answer_text.split("\n")
             # Remove first and last lines (``` markers)
             lines = [l for l in lines if not l.startswith("```")]
             answer_text = "\n".join(lines).strip()
 
-        # Check if it looks like a JSON with an 'answer' field - extract just the answer
-        if answer_text.startswith("{") and '"answer"' in answer_text:
-            try:
-                parsed = json.loads(answer_text)
-                if isinstance(parsed, dict) and "answer" in parsed:
-                    # Extract just the answer value
-                    return parsed["answer"]
-            except json.JSONDecodeError:
-                pass
-
-        # Try boolean
-        if answer_text.lower() in ("true", "false"):
-            return answer_text.lower() == "true"
-
-        # Try integer
-        try:
-            if "." not in answer_text and answer_text.lstrip("-").isdigit():
-                return int(answer_text)
-        except ValueError:
-            pass
+        # Boolean
+        boolean = _BOOL.get(answer_text.lower())
+        if boolean is not None:
+            return boolean
 
-        # Try float
-        try:
-            if re.match(r"^-?\d+\.?\d*$", answer_text):
-                return float(answer_text)
-        except ValueError:
-            pass
+        # Integer or float
+        if _NUM_RE.fullmatch(answer_text):
+            return float(answer_text) if "." in answer_text else int(answer_text)
 
-        # Try JSON
+        # JSON; a payload with an 'answer' field yields just the answer
         try:
-            return json.loads(answer_text)
+            parsed = json.loads(answer_text)
         except json.JSONDecodeError:
-            pass
+            # Return as string
+            return answer_text
 
-        # Return as string
-        return answer_text
+        if isinstance(parsed, dict) and "answer" in parsed:
+            return parsed["answer"]
+        return parsed
 
     async def analyze_with_vision(
         self,
-        image_base64: str,
+        image: Union[str, bytes],
         prompt: str,
+        mime_type: str = "image/png",
+        use_cache: bool = True,
     ) -> Any:
-        """Analyze an image (screenshot, chart, PDF page) with a specific prompt."""
+        """
+        Analyze an image (screenshot, chart, PDF page) with a specific prompt.
+
+        ``image`` may be raw bytes or an already base64-encoded string.
+        With ``use_cache=False`` the model is always asked again and the
+        fresh answer replaces any cached one.
+        """
+        key = _cache_key("vision", self.model, mime_type, prompt, image)
+        _note_key(key)
+        if use_cache and key in _ANSWER_CACHE:
+            logger.info("Vision answer served from cache")
+            return _ANSWER_CACHE[key]
+
+        if isinstance(image, (bytes, bytearray)):
+            # Encode in a worker thread so large screenshots don't stall the loop
+            image = (await asyncio.to_thread(base64.b64encode, image)).decode("ascii")
+
         messages = [
             {
                 "role": "system",
@@ -157,7 +246,7 @@ Example: If the quiz shows "answer": "anything you want", return: anything you w
                     {
                         "type": "image_url",
                         "image_url": {
-                            "url": f"data:image/png;base64,{image_base64}",
+                            "url": f"data:{mime_type};base64,{image}",
                             "detail": "high",
                         },
                     },
@@ -173,7 +262,9 @@ Example: If the quiz shows "answer": "anything you want", return: anything you w
             temperature=0,
         )
 
-        return response.choices[0].message.content.strip()
+        answer = response.choices[0].message.content.strip()
+        _ANSWER_CACHE[key] = answer
+        return answer
 
     async def extract_structured_data(
         self,
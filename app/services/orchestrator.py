@@ -1,8 +1,14 @@
 import asyncio
+import base64
 import logging
-from typing import Any, List, Optional
+import re
+from functools import cached_property
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
 
 from app.services.browser import BrowserService
+from app.services.http import HttpClient
 from app.services.quiz_parser import QuizParser
 from app.services.llm import LLMService
 from app.services.submitter import AnswerSubmitter
@@ -13,6 +19,25 @@ from app.models import QuizContent, QuizResult
 
 logger = logging.getLogger(__name__)
 
+# Pages with scripts may inject the quiz client-side and need a real browser
+_SCRIPT_RE = re.compile(r"<script\b", re.IGNORECASE)
+
+# Relative URL a scraping quiz points at ("scrape /x", "visit /x", "get ... from /x", href="/x")
+_SCRAPE_URL_RE = re.compile(
+    r'(?:[Ss]crape\s+|[Vv]isit\s+|[Gg]et.*?from\s+|href=")(?P<url>/[^\s<>"\']+)'
+)
+
+# One LLM service shared by every orchestrator and its handlers
+_llm = LLMService()
+
+
+def _find_scrape_url(quiz_content: QuizContent) -> Optional[str]:
+    """Relative URL a scraping quiz points at, from the question or else the page HTML."""
+    match = _SCRAPE_URL_RE.search(quiz_content.question) or _SCRAPE_URL_RE.search(
+        quiz_content.raw_html
+    )
+    return match.group("url") if match else None
+
 
 class QuizOrchestrator:
     """Orchestrates the quiz solving workflow."""
@@ -20,12 +45,29 @@ class QuizOrchestrator:
     def __init__(self, email: str, secret: str):
         self.email = email
         self.secret = secret
-        self.llm = LLMService()
+        self.llm = _llm
         self.submitter = AnswerSubmitter(email, secret)
-        self.pdf_handler = PDFHandler(self.llm)
-        self.data_handler = DataHandler(self.llm)
-        self.scraper_handler = ScraperHandler(self.llm)
         self.results: List[QuizResult] = []
+        self._dispatch: Dict[str, Callable[[QuizContent, str], Awaitable[Any]]] = {
+            "pdf": self._solve_pdf_task,
+            "data": self._solve_data_task,
+            "scraping": self._solve_scraping_task,
+            "api": self._solve_api_task,
+        }
+
+    # Handlers are built on first use; most chains only need one or two of them
+
+    @cached_property
+    def pdf_handler(self) -> PDFHandler:
+        return PDFHandler(self.llm, HttpClient.get_client())
+
+    @cached_property
+    def data_handler(self) -> DataHandler:
+        return DataHandler(self.llm, HttpClient.get_client())
+
+    @cached_property
+    def scraper_handler(self) -> ScraperHandler:
+        return ScraperHandler(self.llm)
 
     async def solve_quiz_chain(self, initial_url: str, max_questions: int = 20):
         """
@@ -61,7 +103,6 @@ class QuizOrchestrator:
                 break
 
         logger.info(f"Quiz chain complete. Solved {question_count} questions.")
-        await self.submitter.close()
 
     async def solve_single_quiz(self, url: str) -> QuizResult:
         """
@@ -75,13 +116,10 @@ class QuizOrchestrator:
         """
         # Step 1: Get and render the page content
         logger.info("Step 1: Fetching and rendering page...")
-        page_data = await BrowserService.execute_and_get_content(url)
-        html_content = page_data["rendered_html"]
-        screenshot = page_data["screenshot_base64"]
+        quiz_content = await self._load_quiz(url)
 
         # Step 2: Parse the quiz content
         logger.info("Step 2: Parsing quiz content...")
-        quiz_content = QuizParser.parse_quiz_page(html_content, url)
         logger.info(f"Quiz type: {quiz_content.quiz_type}")
         logger.info(f"Question: {quiz_content.question[:200]}...")
         logger.info(f"Submission URL: {quiz_content.submission_url}")
@@ -96,7 +134,8 @@ class QuizOrchestrator:
 
         # Step 3: Solve based on quiz type
         logger.info(f"Step 3: Solving quiz (type: {quiz_content.quiz_type})...")
-        answer = await self._solve_by_type(quiz_content, screenshot, url)
+        with self.llm.track_answers() as used_keys:
+            answer = await self._solve_by_type(quiz_content, url)
         logger.info(f"Computed answer: {answer}")
 
         # Step 4: Submit the answer
@@ -106,91 +145,122 @@ class QuizOrchestrator:
             url,
             answer,
         )
+        if not result.correct:
+            # Don't serve a rejected answer to a rerun of this quiz
+            self.llm.invalidate(used_keys)
 
         # Step 5: Handle retry if incorrect
         if not result.correct and result.url is None:
             logger.info("Answer incorrect, attempting retry with different approach...")
             # Try with vision analysis
-            answer = await self._solve_with_vision(quiz_content, screenshot)
+            # Bypass the answer cache, or the rejected answer comes straight back
+            with self.llm.track_answers() as used_keys:
+                answer = await self._solve_with_vision(quiz_content, url, use_cache=False)
             result = await self.submitter.submit_answer(
                 submission_url,
                 url,
                 answer,
             )
+            if not result.correct:
+                self.llm.invalidate(used_keys)
 
         return result
 
+    async def _load_quiz(self, url: str) -> QuizContent:
+        """
+        Fetch and parse the quiz page, skipping the browser when possible.
+
+        JSON responses and script-free pages that already contain a
+        submission URL are parsed straight from the HTTP body; anything
+        else is rendered in Playwright.
+        """
+        try:
+            response = await HttpClient.get_client().get(url, follow_redirects=True)
+            content_type = response.headers.get("content-type", "")
+            body = response.text
+
+            if response.is_success and (
+                "application/json" in content_type or not _SCRIPT_RE.search(body)
+            ):
+                quiz_content = QuizParser.parse_quiz_page(body, url)
+                if quiz_content.submission_url:
+                    logger.info("Quiz page is static, skipping browser render")
+                    return quiz_content
+
+        except httpx.HTTPError as e:
+            logger.warning(f"Direct fetch of {url} failed, using browser: {e}")
+
+        async with BrowserService.get_page() as page:
+            html_content = await BrowserService.load_result_html(page, url)
+            quiz_content = QuizParser.parse_quiz_page(html_content, url)
+            if self._needs_screenshot(quiz_content):
+                # Capture in the page already loaded rather than loading it again later
+                await self._store_screenshot(quiz_content, await BrowserService.get_screenshot(page))
+        return quiz_content
+
+    @staticmethod
+    def _needs_screenshot(quiz_content: QuizContent) -> bool:
+        """Whether solving this quiz will certainly use the page screenshot."""
+        if quiz_content.quiz_type == "pdf":
+            return not quiz_content.download_url
+        if quiz_content.quiz_type == "api":
+            return False
+        if quiz_content.quiz_type == "scraping":
+            return _find_scrape_url(quiz_content) is None
+        # Data quizzes describe the page; everything else is solved by vision
+        return True
+
     async def _solve_by_type(
         self,
         quiz_content: QuizContent,
-        screenshot: str,
         base_url: str,
     ) -> Any:
-        """Solve the quiz based on its type."""
-
-        if quiz_content.quiz_type == "pdf" and quiz_content.download_url:
-            download_url = QuizParser.make_absolute_url(quiz_content.download_url, base_url)
-            return await self.pdf_handler.solve(
-                quiz_content.question,
-                download_url,
-            )
+        """Solve the quiz based on its type; unknown types go to vision."""
+        solver = self._dispatch.get(quiz_content.quiz_type, self._solve_with_vision)
+        return await solver(quiz_content, base_url)
 
-        if quiz_content.quiz_type == "data":
-            download_url = None
-            if quiz_content.download_url:
-                download_url = QuizParser.make_absolute_url(quiz_content.download_url, base_url)
+    async def _solve_pdf_task(self, quiz_content: QuizContent, base_url: str) -> Any:
+        """Solve a PDF quiz from its download; without one, fall back to vision."""
+        if not quiz_content.download_url:
+            return await self._solve_with_vision(quiz_content, base_url)
 
-            # For data quizzes, also use vision to understand the question better
-            vision_analysis = await self.llm.analyze_with_vision(
-                screenshot,
-                "Describe this quiz page. What exactly is the question asking? What data operation is needed? What format should the answer be in?"
-            )
-
-            # Combine the question with vision analysis for better context
-            enhanced_question = f"{quiz_content.question}\n\nPage Analysis: {vision_analysis}"
+        download_url = QuizParser.make_absolute_url(quiz_content.download_url, base_url)
+        return await self.pdf_handler.solve(
+            quiz_content.question,
+            download_url,
+        )
 
-            return await self.data_handler.solve(
-                enhanced_question,
-                download_url,
-                quiz_content.raw_html,
-            )
+    async def _solve_data_task(self, quiz_content: QuizContent, base_url: str) -> Any:
+        """Solve a data quiz from its download or inline data."""
+        download_url = None
+        if quiz_content.download_url:
+            download_url = QuizParser.make_absolute_url(quiz_content.download_url, base_url)
 
-        if quiz_content.quiz_type == "scraping":
-            return await self._solve_scraping_task(quiz_content, base_url, screenshot)
+        # For data quizzes, also use vision to understand the question better;
+        # the page description and the data download are independent
+        vision_analysis, prefetched = await asyncio.gather(
+            self._describe_page(quiz_content, base_url),
+            self.data_handler.load(download_url),
+        )
 
-        if quiz_content.quiz_type == "api":
-            return await self._solve_api_task(quiz_content, base_url)
+        # Combine the question with vision analysis for better context
+        enhanced_question = f"{quiz_content.question}\n\nPage Analysis: {vision_analysis}"
 
-        # Default: use LLM with both text and vision
-        return await self._solve_with_vision(quiz_content, screenshot)
+        return await self.data_handler.solve(
+            enhanced_question,
+            download_url,
+            quiz_content.raw_html,
+            prefetched=prefetched,
+        )
 
     async def _solve_scraping_task(
         self,
         quiz_content: QuizContent,
         base_url: str,
-        screenshot: str,
     ) -> Any:
         """Solve a web scraping task by actually visiting and scraping the URL."""
-        import re
-
         # Extract the URL to scrape from the question
-        question = quiz_content.question
-        raw_html = quiz_content.raw_html
-
-        # Look for relative URLs to scrape in the question
-        url_patterns = [
-            r'[Ss]crape\s+(/[^\s<>"\']+)',
-            r'[Vv]isit\s+(/[^\s<>"\']+)',
-            r'[Gg]et.*?from\s+(/[^\s<>"\']+)',
-            r'href="(/[^"]+)"',
-        ]
-
-        scrape_url = None
-        for pattern in url_patterns:
-            match = re.search(pattern, question + raw_html)
-            if match:
-                scrape_url = match.group(1)
-                break
+        scrape_url = _find_scrape_url(quiz_content)
 
         if scrape_url:
             # Make absolute
@@ -209,12 +279,13 @@ class QuizOrchestrator:
             return answer
 
         # Fallback to vision if we can't find a URL to scrape
-        return await self._solve_with_vision(quiz_content, screenshot)
+        return await self._solve_with_vision(quiz_content, base_url)
 
     async def _solve_with_vision(
         self,
         quiz_content: QuizContent,
-        screenshot: str,
+        url: str,
+        use_cache: bool = True,
     ) -> Any:
         """Solve using GPT-4o vision capabilities."""
         prompt = f"""Look at this quiz page screenshot and answer the question.
@@ -229,9 +300,40 @@ Instructions:
 4. Return ONLY the answer value (number, string, boolean, or JSON)
 5. Do NOT include explanations"""
 
-        answer = await self.llm.analyze_with_vision(screenshot, prompt)
+        answer = await self.llm.analyze_with_vision(
+            await self._get_screenshot(quiz_content, url),
+            prompt,
+            mime_type="image/jpeg",
+            use_cache=use_cache,
+        )
         return self.llm._parse_answer(answer)
 
+    async def _describe_page(self, quiz_content: QuizContent, url: str) -> str:
+        """Ask the vision model what the quiz page is asking for."""
+        return await self.llm.analyze_with_vision(
+            await self._get_screenshot(quiz_content, url),
+            "Describe this quiz page. What exactly is the question asking? What data operation is needed? What format should the answer be in?",
+            mime_type="image/jpeg",
+        )
+
+    async def _get_screenshot(self, quiz_content: QuizContent, url: str) -> str:
+        """
+        Capture and base64-encode the quiz page screenshot on first use
+        (browser-rendered quizzes that need it already have one from _load_quiz).
+
+        The encoded image is kept on ``quiz_content``, so the data-branch
+        description and the vision retry share one capture and one encode.
+        """
+        if quiz_content.screenshot_b64 is None:
+            await self._store_screenshot(quiz_content, await BrowserService.get_screenshot(url))
+        return quiz_content.screenshot_b64
+
+    @staticmethod
+    async def _store_screenshot(quiz_content: QuizContent, screenshot: bytes) -> None:
+        """Base64-encode a screenshot (off the event loop) onto ``quiz_content``."""
+        encoded = await asyncio.to_thread(base64.b64encode, screenshot)
+        quiz_content.screenshot_b64 = encoded.decode("ascii")
+
     async def _solve_api_task(self, quiz_content: QuizContent, base_url: str) -> Any:
         """Solve an API-related task."""
         # Extract API details from the question
@@ -1,12 +1,91 @@
+import json
 import re
 import logging
-from typing import Optional, Tuple
+from functools import lru_cache
+from html import unescape
+from typing import Iterable, Optional, Tuple
+from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
 
 from app.models import QuizContent
 
 logger = logging.getLogger(__name__)
 
+# lxml's C tokenizer is much faster than the pure-Python html.parser
+try:
+    import lxml  # noqa: F401
+    _BS4_PARSER = "lxml"
+except ImportError:
+    _BS4_PARSER = "html.parser"
+
+# selectolax (Lexbor) handles the #result / link lookups far faster than
+# BeautifulSoup; bs4 remains the fallback when it isn't installed
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# Text normalization: rejoin URLs the page text broke across lines. A match
+# is either a newline before a "/" or a URL plus the token on the next line
+# (also allowing "/"-continuations); every newline inside a match is dropped
+_URL_BREAK_RE = re.compile(
+    r'https?:\n?/\n?/(?:\S|\n(?=/))+\n(?!/)(?:\S|\n(?=/))+'
+    r'|\n(?=/)'
+)
+
+# Submission URL patterns, in priority order. Each is its own scan: in one
+# alternation a "POST ... to" match can swallow a /submit URL that must win
+_URL_CHARS = r'[^\s<>"\'\{\}\[\]]'
+_SUBMISSION_PATTERNS = tuple(
+    re.compile(p, re.IGNORECASE)
+    for p in (
+        rf'\bhttps?://{_URL_CHARS}+/submit{_URL_CHARS}*',
+        rf'\bhttps?://{_URL_CHARS}+/answer{_URL_CHARS}*',
+        rf'Post your answer to\s+(https?://{_URL_CHARS}+)',
+        # Bounded, single-line gap so a stray "POST" can't trigger a long lazy scan
+        rf'POST[^\n]{{0,200}}?to\s+(https?://{_URL_CHARS}+)',
+    )
+)
+# Trailing characters that are punctuation around a URL, not part of it
+_TRIM_CHARS = '{}[]<>"\' \t\n\r\f\v.,;:'
+_BASE_URL = re.compile(r'(https?://[^\s<>"\'/\n]+)')
+_ALL_URLS = re.compile(r'https?://[^\s<>"\']+')
+
+# Downloadable file links
+_FILE_HREF = re.compile(r'\.(?:pdf|csv|json|xlsx|txt|zip)', re.IGNORECASE)
+_SUBMIT_HREF = re.compile(r'submit', re.IGNORECASE)
+_FILE_URL_RE = re.compile(
+    r'https?://[^\s<>"\']+\.(?:pdf|csv|json|xlsx|txt|zip)[^\s<>"\']*', re.IGNORECASE
+)
+
+# Quiz type keywords (word-prefix matches); group names are the quiz types
+_TYPE_RE = re.compile(
+    r'(?P<api>\b(?:api|endpoint))'
+    r'|(?P<visualization>\b(?:chart|plot|graph|visualiz))'
+    r'|(?P<data>\b(?:sum|average|count|filter|sort|aggregate))'
+    r'|(?P<scraping>\b(?:scrape|extract|website|page))',
+    re.IGNORECASE,
+)
+_TYPE_PRIORITY = {"api": 0, "visualization": 1, "data": 2, "scraping": 3}
+
+# Input that is nothing but the #result element (what BrowserService.get_result_html returns)
+_RESULT_ROOT_RE = re.compile(r'\s*<\w+[^>]*\bid=["\']?result["\'\s>]')
+
+# Text fallback for pages without #result: tag stripping over a bounded prefix
+_TAG_RE = re.compile(r'<[^>]+>')
+_SCRIPT_STYLE_RE = re.compile(r'<(script|style)\b[^>]*>.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_MAX_FALLBACK_HTML_CHARS = 100_000
+
+# Question lines to drop: JSON payload examples and submission instructions
+_SKIP_LINE = re.compile(r'^[{}]|email.*secret|secret.*email|post your answer', re.IGNORECASE)
+
+
+@lru_cache(maxsize=64)
+def _origin(base_url: str) -> str:
+    """Scheme and host of a URL, e.g. https://example.com."""
+    parsed = urlparse(base_url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
 
 class QuizParser:
     """Parse quiz content from rendered HTML pages."""
@@ -23,24 +102,20 @@ class QuizParser:
         Returns:
             QuizContent with parsed question, submission URL, etc.
         """
-        soup = BeautifulSoup(html_content, "html.parser")
-
-        # Get the main content (usually in #result div)
-        result_div = soup.find(id="result")
-        if result_div:
-            content_text = result_div.get_text(separator="\n", strip=True)
-            content_html = str(result_div)
+        if LexborHTMLParser is not None:
+            parsed = QuizParser._parse_fast(html_content)
         else:
-            content_text = soup.get_text(separator="\n", strip=True)
-            content_html = html_content
+            parsed = QuizParser._parse_soup(html_content)
+        content_text, content_html, submission_href, download_href = parsed
 
-        logger.info(f"Parsed content: {content_text[:500]}...")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"Parsed content: {content_text[:500]}...")
 
         # Extract submission URL
-        submission_url = QuizParser._extract_submission_url(content_text, content_html)
+        submission_url = QuizParser._extract_submission_url(content_text, submission_href)
 
         # Extract download URL if present
-        download_url = QuizParser._extract_download_url(content_html)
+        download_url = QuizParser._extract_download_url(content_text, download_href)
 
         # Determine quiz type
         quiz_type = QuizParser._determine_quiz_type(content_text, download_url)
@@ -57,53 +132,138 @@ class QuizParser:
         )
 
     @staticmethod
-    def _extract_submission_url(text: str, html: str) -> str:
-        """Extract the submission URL from the quiz content."""
-        # First, normalize text by removing newlines within URLs
-        # Join lines that look like they're part of a URL
-        normalized_text = re.sub(r'\n(?=\/)', '', text)  # Join /path after newline
-        normalized_text = re.sub(r'(https?://[^\s]+)\n([^\s]+)', r'\1\2', normalized_text)
+    def _parse_fast(html_content: str) -> Tuple[str, str, Optional[str], Optional[str]]:
+        """
+        Parse with selectolax.
+
+        Returns (content text, content HTML, submission href, download href),
+        where the content is the #result element or, failing that, the page.
+        """
+        tree = LexborHTMLParser(html_content)
+
+        # Get the main content (usually in #result div)
+        result_div = tree.css_first("#result")
+        if result_div is not None:
+            content = result_div
+            if (
+                result_div.prev is None
+                and result_div.next is None
+                and result_div.parent.tag == "body"
+                and _RESULT_ROOT_RE.match(html_content)
+            ):
+                # The input already is the element; don't re-serialize it
+                content_html = html_content
+            else:
+                content_html = result_div.html
+        else:
+            content = tree.root
+            content_html = html_content
+
+        hrefs = [link.attributes.get("href") or "" for link in content.css("a[href]")]
+
+        if result_div is not None:
+            # Script and style bodies are not page text (bs4 skips them too)
+            content.strip_tags(["script", "style"])
+            content_text = content.text(separator="\n", strip=True, skip_empty=True)
+        else:
+            content_text = QuizParser._html_to_text(html_content)
+
+        return (content_text, content_html) + QuizParser._scan_anchors(hrefs)
+
+    @staticmethod
+    def _parse_soup(html_content: str) -> Tuple[str, str, Optional[str], Optional[str]]:
+        """BeautifulSoup equivalent of ``_parse_fast``."""
+        soup = BeautifulSoup(html_content, _BS4_PARSER)
+
+        # Get the main content (usually in #result div)
+        result_div = soup.find(id="result")
+        if result_div:
+            content = result_div
+            content_html = str(result_div)
+            content_text = content.get_text(separator="\n", strip=True)
+        else:
+            content = soup
+            content_html = html_content
+            content_text = QuizParser._html_to_text(html_content)
 
-        # Also try the raw HTML for href attributes
-        soup = BeautifulSoup(html, "html.parser")
+        hrefs = (link["href"] for link in content.find_all("a", href=True))
+        return (content_text, content_html) + QuizParser._scan_anchors(hrefs)
 
+    @staticmethod
+    def _html_to_text(html: str) -> str:
+        """
+        Cheap text extraction for pages without #result: drop script/style
+        blocks, then strip tags from at most the first 100k characters left,
+        one non-empty line per text run.
+        """
+        # Truncate only after removing scripts, so a long inline <script>
+        # can't be cut open and leak its source into the text
+        html = _SCRIPT_STYLE_RE.sub("\n", html)[:_MAX_FALLBACK_HTML_CHARS]
+        text = unescape(_TAG_RE.sub("\n", html))
+        return "\n".join(line for line in (raw.strip() for raw in text.split("\n")) if line)
+
+    @staticmethod
+    def _scan_anchors(hrefs: Iterable[str]) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Walk the links once, returning the first submission href and the
+        first file download href (either may be None).
+        """
+        submission_href = None
+        download_href = None
+
+        for href in hrefs:
+            if submission_href is None and _SUBMIT_HREF.search(href):
+                submission_href = href
+            if download_href is None and _FILE_HREF.search(href):
+                download_href = href
+            if submission_href is not None and download_href is not None:
+                break
+
+        return submission_href, download_href
+
+    @staticmethod
+    def _extract_submission_url(text: str, submission_href: Optional[str] = None) -> str:
+        """
+        Extract the submission URL from the quiz content.
+
+        A /submit URL outranks any /answer URL, even inside a "POST ... to":
+
+        >>> QuizParser._extract_submission_url(
+        ...     "POST this JSON to https://ex.com/submit (schema: https://ex.com/answer-format)"
+        ... )
+        'https://ex.com/submit'
+        """
         # First check href attributes (most reliable)
-        for link in soup.find_all("a", href=True):
-            href = link["href"]
-            if "submit" in href.lower():
-                logger.info(f"Found submission URL in href: {href}")
-                return href
+        if submission_href:
+            logger.info(f"Found submission URL in href: {submission_href}")
+            return submission_href
 
-        # Look for URLs in the normalized text
-        patterns = [
-            r'https?://[^\s<>"\'\{\}\[\]]+/submit(?:[^\s<>"\'\{\}\[\]]*)?',
-            r'https?://[^\s<>"\'\{\}\[\]]+/answer(?:[^\s<>"\'\{\}\[\]]*)?',
-            r'Post your answer to\s+(https?://[^\s<>"\'\{\}\[\]]+)',
-            r'POST.*?to\s+(https?://[^\s<>"\'\{\}\[\]]+)',
-        ]
+        # Otherwise, normalize text by removing newlines within URLs
+        # Join lines that look like they're part of a URL
+        normalized_text = _URL_BREAK_RE.sub(lambda m: m.group(0).replace("\n", ""), text)
 
-        for pattern in patterns:
-            match = re.search(pattern, normalized_text, re.IGNORECASE)
+        # Look for URLs in the normalized text
+        for pattern in _SUBMISSION_PATTERNS:
+            match = pattern.search(normalized_text)
             if match:
-                url = match.group(1) if match.lastindex else match.group(0)
                 # Clean any trailing non-URL characters
-                url = re.sub(r'[{}\[\]<>"\'\s.,;:]+$', '', url)
+                url = match.group(match.lastindex or 0).rstrip(_TRIM_CHARS)
                 logger.info(f"Found submission URL: {url}")
                 return url
 
         # Try to reconstruct URL from base domain + /submit
-        base_url_match = re.search(r'(https?://[^\s<>"\'/\n]+)', text)
+        base_url_match = _BASE_URL.search(text)
         if base_url_match:
             base_url = base_url_match.group(1)
             if "/submit" in text.lower():
                 constructed_url = f"{base_url}/submit"
                 # Clean any trailing non-URL characters
-                constructed_url = re.sub(r'[{}\[\]<>"\'\s]+$', '', constructed_url)
+                constructed_url = constructed_url.rstrip(_TRIM_CHARS)
                 logger.info(f"Constructed submission URL: {constructed_url}")
                 return constructed_url
 
         # Fallback: look for any https URL with submit
-        all_urls = re.findall(r'https?://[^\s<>"\']+', normalized_text)
+        all_urls = _ALL_URLS.findall(normalized_text)
         for url in all_urls:
             if "submit" in url.lower() or "answer" in url.lower():
                 return url.rstrip(".,;:\"'")
@@ -112,89 +272,59 @@ class QuizParser:
         return ""
 
     @staticmethod
+    @lru_cache(maxsize=1024)
     def make_absolute_url(url: str, base_url: str) -> str:
-        """Convert a relative URL to absolute using the base URL."""
+        """Convert a relative URL to absolute using the base URL (memoized; URLs recur across a chain)."""
         if url.startswith("http"):
             return url
 
-        from urllib.parse import urljoin, urlparse
-        parsed = urlparse(base_url)
-        base = f"{parsed.scheme}://{parsed.netloc}"
-        return urljoin(base, url)
+        return urljoin(_origin(base_url), url)
 
     @staticmethod
-    def _extract_download_url(html: str) -> Optional[str]:
+    def _extract_download_url(text: str, download_href: Optional[str] = None) -> Optional[str]:
         """Extract download URL for files (PDFs, data files, etc.)."""
-        soup = BeautifulSoup(html, "html.parser")
-
-        # Look for links with file extensions
-        file_extensions = [".pdf", ".csv", ".json", ".xlsx", ".txt", ".zip"]
-
-        for link in soup.find_all("a", href=True):
-            href = link["href"]
-            for ext in file_extensions:
-                if ext in href.lower():
-                    # Make absolute URL if needed
-                    if href.startswith("http"):
-                        return href
-                    logger.info(f"Found download URL: {href}")
-                    return href
-
-        # Also check in text
-        text = soup.get_text()
-        for ext in file_extensions:
-            pattern = rf'(https?://[^\s<>"\']+{ext}[^\s<>"\']*)'
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return match.group(1).rstrip(".,;:\"'")
+        # Links with file extensions take precedence
+        if download_href:
+            if not download_href.startswith("http"):
+                logger.info(f"Found download URL: {download_href}")
+            return download_href
+
+        # Also check the page text
+        match = _FILE_URL_RE.search(text)
+        if match:
+            return match.group(0).rstrip(".,;:\"'")
 
         return None
 
     @staticmethod
     def _determine_quiz_type(text: str, download_url: Optional[str]) -> str:
         """Determine the type of quiz based on content."""
-        text_lower = text.lower()
-
         if download_url:
-            if ".pdf" in download_url.lower():
+            download_lower = download_url.lower()
+            if ".pdf" in download_lower:
                 return "pdf"
-            if any(ext in download_url.lower() for ext in [".csv", ".xlsx", ".json"]):
+            if any(ext in download_lower for ext in [".csv", ".xlsx", ".json"]):
                 return "data"
 
-        if "api" in text_lower or "endpoint" in text_lower:
-            return "api"
-
-        if any(word in text_lower for word in ["chart", "plot", "graph", "visualiz"]):
-            return "visualization"
-
-        if any(word in text_lower for word in ["sum", "average", "count", "filter", "sort", "aggregate"]):
-            return "data"
+        # One pass over the text; the highest-priority keyword category wins
+        quiz_type = "general"
+        for match in _TYPE_RE.finditer(text):
+            if quiz_type == "general" or _TYPE_PRIORITY[match.lastgroup] < _TYPE_PRIORITY[quiz_type]:
+                quiz_type = match.lastgroup
+                if quiz_type == "api":
+                    break
 
-        if any(word in text_lower for word in ["scrape", "extract", "website", "page"]):
-            return "scraping"
-
-        return "general"
+        return quiz_type
 
     @staticmethod
     def _extract_question(text: str) -> str:
         """Extract the question from the quiz text."""
-        # Remove submission instructions
-        lines = text.split("\n")
-        question_lines = []
-
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            # Skip JSON payload examples
-            if line.startswith("{") or line.startswith("}"):
-                continue
-            if "email" in line.lower() and "secret" in line.lower():
-                continue
-            if "post your answer" in line.lower():
-                continue
-
-            question_lines.append(line)
+        # Remove submission instructions and JSON payload examples
+        question_lines = [
+            line
+            for line in (raw.strip() for raw in text.split("\n"))
+            if line and not _SKIP_LINE.search(line)
+        ]
 
         question = "\n".join(question_lines[:10])  # First 10 meaningful lines
         return question
@@ -202,16 +332,16 @@ class QuizParser:
     @staticmethod
     def extract_json_payload_format(text: str) -> dict:
         """Extract the expected JSON payload format from the quiz."""
-        # Look for JSON-like structures in the text
-        json_pattern = r'\{[^{}]*\}'
-        matches = re.findall(json_pattern, text, re.DOTALL)
-
-        for match in matches:
+        # Try to decode a JSON object at each '{' until one parses
+        decoder = json.JSONDecoder()
+        start = text.find("{")
+        while start != -1:
             try:
-                # Try to parse as JSON
-                import json
-                return json.loads(match)
-            except:
-                continue
+                obj, _ = decoder.raw_decode(text, start)
+                if isinstance(obj, dict):
+                    return obj
+            except ValueError:
+                pass
+            start = text.find("{", start + 1)
 
         return {}
@@ -1,6 +1,9 @@
+import asyncio
+import json
 import logging
-from typing import Any, Optional
+from typing import Any, List, Optional, Tuple
 import httpx
+import orjson
 
 from app.models import AnswerSubmission, QuizResult
 
@@ -10,10 +13,35 @@ logger = logging.getLogger(__name__)
 class AnswerSubmitter:
     """Service for submitting answers to quiz endpoints."""
 
+    _client: Optional[httpx.AsyncClient] = None
+
     def __init__(self, email: str, secret: str):
         self.email = email
         self.secret = secret
-        self.client = httpx.AsyncClient(timeout=30.0)
+
+    @classmethod
+    def _get_client(cls) -> httpx.AsyncClient:
+        """Get the HTTP client shared by all submitters, creating it on first use."""
+        # Submissions hit the same few hosts; keep the connections alive across chains
+        if cls._client is None or cls._client.is_closed:
+            cls._client = httpx.AsyncClient(
+                http2=True,
+                timeout=httpx.Timeout(30.0, connect=5.0),
+                limits=httpx.Limits(
+                    max_keepalive_connections=20,
+                    max_connections=50,
+                    keepalive_expiry=60.0,
+                ),
+                headers={"Content-Type": "application/json"},
+            )
+        return cls._client
+
+    @classmethod
+    async def close_client(cls) -> None:
+        """Close the shared HTTP client."""
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
 
     async def submit_answer(
         self,
@@ -40,20 +68,21 @@ class AnswerSubmitter:
         }
 
         logger.info(f"Submitting answer to {submission_url}")
-        logger.info(f"Payload: {payload}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Payload: {payload}")
 
         try:
-            response = await self.client.post(
+            response = await self._get_client().post(
                 submission_url,
-                json=payload,
-                headers={"Content-Type": "application/json"},
+                content=self._encode_payload(payload),
             )
 
-            logger.info(f"Response status: {response.status_code}")
-            logger.info(f"Response body: {response.text[:500]}...")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"Response status: {response.status_code}")
+                logger.info(f"Response body: {response.text[:500]}...")
 
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 return QuizResult(
                     correct=data.get("correct", False),
                     url=data.get("url"),
@@ -73,6 +102,36 @@ class AnswerSubmitter:
                 reason=str(e),
             )
 
-    async def close(self):
-        """Close the HTTP client."""
-        await self.client.aclose()
+    @staticmethod
+    def _encode_payload(payload: dict) -> bytes:
+        """Serialize with orjson, falling back to json for what it rejects (e.g. ints over 64 bits)."""
+        try:
+            return orjson.dumps(
+                payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            )
+        except orjson.JSONEncodeError:
+            return json.dumps(payload).encode()
+
+    async def submit_many(
+        self,
+        items: List[Tuple[str, str, Any]],
+        concurrency: int = 10,
+    ) -> List[QuizResult]:
+        """
+        Submit several answers concurrently.
+
+        Args:
+            items: (submission_url, quiz_url, answer) tuples
+            concurrency: Maximum number of submissions in flight at once
+
+        Returns:
+            QuizResults in the same order as ``items``
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def submit_one(submission_url: str, quiz_url: str, answer: Any) -> QuizResult:
+            async with semaphore:
+                return await self.submit_answer(submission_url, quiz_url, answer)
+
+        # Over HTTP/2 these share one connection as concurrent streams
+        return await asyncio.gather(*(submit_one(*item) for item in items))